@@ -1,8 +1,51 @@
 from jesse.strategies import Strategy
 import jesse.indicators as ta
 from jesse import utils
+import atexit
+import numpy as np
+import queue
 import requests
+import threading
+from collections import deque
+from requests.adapters import HTTPAdapter
 from typing import Union
+from urllib3.util.retry import Retry
+
+from ._kernels import ema_tail, volume_filters, wilder_rsi, wilder_rsi_state, wilder_rsi_step
+
+
+# ========== ENVOI TELEGRAM EN ARRIÈRE-PLAN ==========
+# Session unique : connexions keep-alive réutilisées d'un message à l'autre.
+# Aucune relance automatique : une connexion bloquée ne retient pas la file.
+_TG_SESSION = requests.Session()
+_TG_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(total=0, connect=0, read=0),
+))
+_TG_Q = queue.Queue()
+
+
+def _tg_worker():
+    """Envoie les messages Telegram en file, hors du chemin de la stratégie"""
+    while True:
+        url, data = _TG_Q.get()
+        try:
+            _TG_SESSION.post(url, json=data, timeout=3)
+        except Exception as e:
+            print(f"Erreur Telegram: {e}")
+        finally:
+            _TG_Q.task_done()
+
+
+def _tg_flush(timeout: float = 10.0):
+    """À la sortie du processus, laisse partir les messages encore en file (attente bornée)"""
+    with _TG_Q.all_tasks_done:
+        _TG_Q.all_tasks_done.wait_for(lambda: not _TG_Q.unfinished_tasks, timeout)
+
+
+threading.Thread(target=_tg_worker, daemon=True).start()
+atexit.register(_tg_flush)
 
 
 class VolumeEMAStrategy(Strategy):
@@ -14,6 +57,20 @@ class VolumeEMAStrategy(Strategy):
     def __init__(self):
         super().__init__()
         self.telegram_sent = False
+        # Copie des hyperparamètres, faite au premier before() (self.hp n'existe pas encore ici)
+        self._hp = None
+        self._tg_url = None
+        self._tg_enabled = False
+        # Colonnes volume / clôture de la bougie courante (vues fixées dans before())
+        self._vols = None
+        self._closes = None
+        # Horodatage de la dernière bougie traitée par before()
+        self._last_timestamp = None
+        self._reset_incremental_state()
+        self._volume_ok = False
+        # Seuils du trailing stop, fixés à l'ouverture de la position (voir _set_trail_levels())
+        self._trail_activation_price = None
+        self._trail_mult = None
         
     # ========== PARAMÈTRES DE BASE ==========
     def hyperparameters(self):
@@ -47,111 +104,163 @@ class VolumeEMAStrategy(Strategy):
             {'name': 'telegram_chat_id', 'type': str, 'default': ''},
         ]
     
-    # ========== INDICATEURS ==========
-    @property
-    def ema_volume(self):
-        """EMA du volume"""
-        return ta.ema(self.candles[:, 5], self.hp['ema_volume_length'])
+    # ========== MISE À JOUR PAR BOUGIE ==========
+    def before(self):
+        candles = self.candles
+        # Les états incrémentaux n'avancent qu'une fois par bougie
+        timestamp = candles[-1, 0]
+        if timestamp == self._last_timestamp:
+            return
+        # Bougies sautées ou réécrites (reconnexion, backfill) : réamorçage sur l'historique
+        if self._last_timestamp is not None and (len(candles) < 2 or candles[-2, 0] != self._last_timestamp):
+            self._reset_incremental_state()
+        self._last_timestamp = timestamp
+        
+        if self._hp is None:
+            self._load_hp()
+        self._vols = candles[:, 5]
+        self._closes = candles[:, 2]
+        self._update_emas()
+        self._update_volume_filters()
+        self._update_rsi()
+        
+        # Filtres volume communs au LONG et au SHORT : évalués une seule fois par bougie
+        self._volume_ok = (self.volume_spike()
+                           and self.check_volume_growth()
+                           and self.check_sustained_volume()
+                           and self.check_volume_rsi_filter())
     
-    @property
-    def ema_trend(self):
-        """EMA de tendance sur le prix"""
-        return ta.ema(self.candles[:, 2], self.hp['ema_price_trend'])
+    def _reset_incremental_state(self):
+        """Vide les états incrémentaux : ils seront réamorcés sur l'historique complet"""
+        # État des EMA, avancé en O(1) à chaque bougie par _update_emas()
+        self._ema_vol_state = np.nan
+        self._ema_trend_state = np.nan
+        self._ema_vol_history = deque()
+        # État du RSI volume (moyennes de Wilder), avancé par _update_rsi()
+        self._rsi_gain = self._rsi_loss = None
+        self._rsi_prev = None
+        self._volume_rsi_last = np.nan
+        # Résultats des filtres volume de la bougie courante
+        self._volume_spike = False
+        self._volume_growth = 0.0
+        self._consecutive_bars = 0
     
-    @property
-    def volume_rsi(self):
-        """RSI calculé sur le volume"""
-        return ta.rsi(self.candles[:, 5], 14)
+    def _load_hp(self):
+        """Fige les hyperparamètres de l'essai et l'URL Telegram"""
+        self._hp = dict(self.hp)
+        token = self._hp['telegram_token']
+        self._tg_url = f"https://api.telegram.org/bot{token}/sendMessage" if token else None
+        self._tg_enabled = bool(token and self._hp['telegram_chat_id'])
+    
+    def _update_emas(self):
+        """Met à jour les EMA volume/tendance : s_t = α·x_t + (1-α)·s_{t-1}"""
+        vol_length = self._hp['ema_volume_length']
+        trend_length = self._hp['ema_price_trend']
+        n = self._vols.shape[0]
+        
+        # EMA Volume (+ historique court pour les filtres volume)
+        if np.isnan(self._ema_vol_state):
+            # Amorçage unique sur l'historique (EMA initialisée par la SMA des N premières bougies)
+            if n >= vol_length:
+                size = max(self._hp['growth_lookback'] + 1, self._hp['min_consecutive_bars'])
+                self._ema_vol_history = deque(ema_tail(self._vols, vol_length, size), maxlen=size)
+                self._ema_vol_state = self._ema_vol_history[-1]
+        else:
+            alpha = 2 / (vol_length + 1)
+            self._ema_vol_state = alpha * self._vols[-1] + (1 - alpha) * self._ema_vol_state
+            self._ema_vol_history.append(self._ema_vol_state)
+        
+        # EMA de tendance
+        if np.isnan(self._ema_trend_state):
+            if n >= trend_length:
+                self._ema_trend_state = ta.ema(self._closes, trend_length)
+        else:
+            alpha = 2 / (trend_length + 1)
+            self._ema_trend_state = alpha * self._closes[-1] + (1 - alpha) * self._ema_trend_state
+    
+    def _update_volume_filters(self):
+        """Évalue pic, croissance et volume soutenu en un seul appel du noyau"""
+        if np.isnan(self._ema_vol_state):
+            return
+        ema_v = np.array(self._ema_vol_history)
+        self._volume_spike, self._volume_growth, self._consecutive_bars = volume_filters(
+            self._vols[-ema_v.shape[0]:],
+            ema_v,
+            self._hp['growth_lookback'],
+            self._hp['volume_multiplier'],
+            self._hp['min_consecutive_bars'],
+        )
+    
+    def _update_rsi(self, period: int = 14):
+        """RSI du volume en O(1) par bougie (lissage de Wilder)"""
+        v = self._vols[-1]
+        if self._rsi_prev is None:
+            # Amorçage unique sur l'historique
+            if self._vols.shape[0] <= period:
+                return
+            self._rsi_gain, self._rsi_loss = wilder_rsi_state(self._vols, period)
+        else:
+            self._rsi_gain, self._rsi_loss = wilder_rsi_step(
+                self._rsi_gain, self._rsi_loss, v - self._rsi_prev, period
+            )
+        self._rsi_prev = v
+        self._volume_rsi_last = wilder_rsi(self._rsi_gain, self._rsi_loss)
     
+    # ========== INDICATEURS ==========
     @property
     def current_volume(self):
         """Volume actuel"""
-        return self.candles[-1, 5]
+        return self._vols[-1]
     
     @property
     def ema_volume_growth(self):
         """Croissance de l'EMA Volume en %"""
-        lookback = self.hp['growth_lookback']
-        if len(self.ema_volume) < lookback + 1:
-            return 0
-        current_ema = self.ema_volume[-1]
-        past_ema = self.ema_volume[-lookback-1]
-        if past_ema == 0:
-            return 0
-        return ((current_ema - past_ema) / past_ema) * 100
+        return self._volume_growth
     
     @property
     def consecutive_volume_bars(self):
-        """Nombre de bougies consécutives avec volume > EMA"""
-        count = 0
-        for i in range(len(self.candles)-1, -1, -1):
-            if self.candles[i, 5] > self.ema_volume[i]:
-                count += 1
-            else:
-                break
-        return count
+        """Nombre de bougies consécutives avec volume > EMA (compté jusqu'à min_consecutive_bars)"""
+        return self._consecutive_bars
     
     # ========== FILTRES VOLUME ==========
     def check_volume_growth(self) -> bool:
         """Vérifie la croissance de l'EMA Volume"""
-        if not self.hp['use_volume_growth']:
+        if not self._hp['use_volume_growth']:
             return True
-        return self.ema_volume_growth >= self.hp['min_growth_percent']
+        return self.ema_volume_growth >= self._hp['min_growth_percent']
     
     def check_sustained_volume(self) -> bool:
         """Vérifie si le volume est soutenu"""
-        if not self.hp['use_sustained_volume']:
+        if not self._hp['use_sustained_volume']:
             return True
-        return self.consecutive_volume_bars >= self.hp['min_consecutive_bars']
+        return self._consecutive_bars >= self._hp['min_consecutive_bars']
     
     def check_volume_rsi_filter(self) -> bool:
         """Vérifie le RSI du volume"""
-        if not self.hp['use_volume_rsi']:
+        if not self._hp['use_volume_rsi']:
             return True
-        return self.volume_rsi[-1] >= self.hp['min_volume_rsi']
+        return self._volume_rsi_last >= self._hp['min_volume_rsi']
     
     def volume_spike(self) -> bool:
         """Détecte un pic de volume"""
-        return self.current_volume > (self.ema_volume[-1] * self.hp['volume_multiplier'])
+        return self._volume_spike
     
     # ========== CONDITIONS D'ENTRÉE ==========
     def should_long(self) -> bool:
         """Conditions pour LONG"""
-        # Bougie haussière
-        is_bullish = self.close > self.open
-        
-        # Prix au-dessus de la tendance
-        above_trend = self.close > self.ema_trend[-1]
-        
-        # Pic de volume
-        volume_ok = self.volume_spike()
-        
-        # Filtres volume avancés
-        growth_ok = self.check_volume_growth()
-        sustained_ok = self.check_sustained_volume()
-        rsi_ok = self.check_volume_rsi_filter()
-        
-        return (is_bullish and above_trend and volume_ok and 
-                growth_ok and sustained_ok and rsi_ok)
+        # Pic + filtres volume (before()) : rejette presque toutes les bougies
+        if not self._volume_ok:
+            return False
+        close = self.close
+        return close > self.open and close > self._ema_trend_state  # Haussière, au-dessus de la tendance
     
     def should_short(self) -> bool:
         """Conditions pour SHORT"""
-        # Bougie baissière
-        is_bearish = self.close < self.open
-        
-        # Prix en-dessous de la tendance
-        below_trend = self.close < self.ema_trend[-1]
-        
-        # Pic de volume
-        volume_ok = self.volume_spike()
-        
-        # Filtres volume avancés
-        growth_ok = self.check_volume_growth()
-        sustained_ok = self.check_sustained_volume()
-        rsi_ok = self.check_volume_rsi_filter()
-        
-        return (is_bearish and below_trend and volume_ok and 
-                growth_ok and sustained_ok and rsi_ok)
+        # Pic + filtres volume (before()) : rejette presque toutes les bougies
+        if not self._volume_ok:
+            return False
+        close = self.close
+        return close < self.open and close < self._ema_trend_state  # Baissière, sous la tendance
     
     def should_cancel_entry(self) -> bool:
         return False
@@ -162,13 +271,13 @@ class VolumeEMAStrategy(Strategy):
         qty = self.position_size
         
         # Take Profit
-        tp = self.price + (self.price * self.hp['tp_percent'] / 100)
+        tp = self.price + (self.price * self._hp['tp_percent'] / 100)
         
         # Stop Loss
-        if self.hp['use_ema_sl']:
-            sl = self.ema_trend[-1]
+        if self._hp['use_ema_sl']:
+            sl = self._ema_trend_state
         else:
-            sl = self.price - (self.price * self.hp['sl_percent'] / 100)
+            sl = self.price - (self.price * self._hp['sl_percent'] / 100)
         
         self.buy = qty, self.price
         self.take_profit = qty, tp
@@ -182,13 +291,13 @@ class VolumeEMAStrategy(Strategy):
         qty = self.position_size
         
         # Take Profit
-        tp = self.price - (self.price * self.hp['tp_percent'] / 100)
+        tp = self.price - (self.price * self._hp['tp_percent'] / 100)
         
         # Stop Loss
-        if self.hp['use_ema_sl']:
-            sl = self.ema_trend[-1]
+        if self._hp['use_ema_sl']:
+            sl = self._ema_trend_state
         else:
-            sl = self.price + (self.price * self.hp['sl_percent'] / 100)
+            sl = self.price + (self.price * self._hp['sl_percent'] / 100)
         
         self.sell = qty, self.price
         self.take_profit = qty, tp
@@ -199,16 +308,18 @@ class VolumeEMAStrategy(Strategy):
     
     def update_position(self):
         """Mise à jour trailing stop"""
-        if not self.hp['use_trailing_stop']:
+        if not self._hp['use_trailing_stop']:
             return
         
+        # Position reprise sans passer par on_open_position() (ex. redémarrage en live)
+        if self._trail_activation_price is None:
+            self._set_trail_levels()
+        
         if self.is_long:
             # Activation du trailing stop
-            activation_price = self.position.entry_price * (1 + self.hp['trail_activation'] / 100)
-            
-            if self.price >= activation_price:
+            if self.price >= self._trail_activation_price:
                 # Calcul nouveau stop loss
-                new_sl = self.price * (1 - self.hp['trail_offset'] / 100)
+                new_sl = self.price * self._trail_mult
                 
                 # Mise à jour si meilleur que l'actuel
                 if new_sl > self.stop_loss[0][1]:
@@ -216,11 +327,9 @@ class VolumeEMAStrategy(Strategy):
         
         elif self.is_short:
             # Activation du trailing stop
-            activation_price = self.position.entry_price * (1 - self.hp['trail_activation'] / 100)
-            
-            if self.price <= activation_price:
+            if self.price <= self._trail_activation_price:
                 # Calcul nouveau stop loss
-                new_sl = self.price * (1 + self.hp['trail_offset'] / 100)
+                new_sl = self.price * self._trail_mult
                 
                 # Mise à jour si meilleur que l'actuel
                 if new_sl < self.stop_loss[0][1]:
@@ -229,41 +338,38 @@ class VolumeEMAStrategy(Strategy):
     # ========== TELEGRAM NOTIFICATION ==========
     def send_telegram_notification(self, side: str, tp: float, sl: float):
         """Envoie une notification sur Telegram"""
-        token = self.hp['telegram_token']
-        chat_id = self.hp['telegram_chat_id']
-        
-        if not token or not chat_id:
+        if not self._tg_enabled:
             return
         
+        # Le noyau arrête le comptage au seuil : au-delà, seul « ≥ seuil » est connu
+        consec = self.consecutive_volume_bars
+        consec_label = f"≥{consec}" if consec >= self._hp['min_consecutive_bars'] else str(consec)
+        
         # Message formaté
         message = f"""
 🚀 SIGNAL {side} - {self.symbol}
 
 💰 Prix d'entrée: {self.price:.8f}
-🎯 Take Profit: {tp:.8f} (+{self.hp['tp_percent']}%)
-🛡 Stop Loss: {sl:.8f} (-{self.hp['sl_percent']}%)
+🎯 Take Profit: {tp:.8f} (+{self._hp['tp_percent']}%)
+🛡 Stop Loss: {sl:.8f} (-{self._hp['sl_percent']}%)
 
 📊 Volume: {self.current_volume:.0f}
-📈 EMA Vol: {self.ema_volume[-1]:.0f}
-🔥 Multiplier: {self.current_volume/self.ema_volume[-1]:.2f}x
+📈 EMA Vol: {self._ema_vol_state:.0f}
+🔥 Multiplier: {self.current_volume/self._ema_vol_state:.2f}x
 
 📉 Croissance EMA Vol: {self.ema_volume_growth:.2f}%
-📊 RSI Volume: {self.volume_rsi[-1]:.1f}
-🔄 Bougies consécutives: {self.consecutive_volume_bars}
+📊 RSI Volume: {self._volume_rsi_last:.1f}
+🔄 Bougies consécutives: {consec_label}
 
 ⏰ {utils.timestamp_to_time(self.current_candle[0])}
         """
         
-        try:
-            url = f"https://api.telegram.org/bot{token}/sendMessage"
-            data = {
-                "chat_id": chat_id,
-                "text": message,
-                "parse_mode": "HTML"
-            }
-            requests.post(url, data=data, timeout=5)
-        except Exception as e:
-            print(f"Erreur Telegram: {e}")
+        data = {
+            "chat_id": self._hp['telegram_chat_id'],
+            "text": message,
+            "parse_mode": "HTML"
+        }
+        _TG_Q.put((self._tg_url, data))
     
     # ========== MÉTHODES ADDITIONNELLES ==========
     @property
@@ -279,10 +385,21 @@ class VolumeEMAStrategy(Strategy):
     def on_open_position(self, order):
         """Callback à l'ouverture de position"""
         self.telegram_sent = False
+        self._set_trail_levels()
+    
+    def _set_trail_levels(self):
+        """Seuils du trailing stop, constants pendant toute la position"""
+        side = 1 if self.is_long else -1
+        self._trail_activation_price = self.position.entry_price * (1 + side * self._hp['trail_activation'] / 100)
+        self._trail_mult = 1 - side * self._hp['trail_offset'] / 100
     
     def on_close_position(self, order):
         """Callback à la fermeture de position"""
-        if not self.hp['telegram_token'] or not self.hp['telegram_chat_id']:
+        # Pas de seuils périmés pour la position suivante
+        self._trail_activation_price = None
+        self._trail_mult = None
+        
+        if not self._tg_enabled:
             return
         
         pnl = self.position.pnl
@@ -296,13 +413,9 @@ class VolumeEMAStrategy(Strategy):
 ⏰ {utils.timestamp_to_time(self.current_candle[0])}
         """
         
-        try:
-            url = f"https://api.telegram.org/bot{self.hp['telegram_token']}/sendMessage"
-            data = {
-                "chat_id": self.hp['telegram_chat_id'],
-                "text": message,
-                "parse_mode": "HTML"
-            }
-            requests.post(url, data=data, timeout=5)
-        except Exception as e:
-            print(f"Erreur Telegram: {e}")
\ No newline at end of file
+        data = {
+            "chat_id": self._hp['telegram_chat_id'],
+            "text": message,
+            "parse_mode": "HTML"
+        }
+        _TG_Q.put((self._tg_url, data))
\ No newline at end of file
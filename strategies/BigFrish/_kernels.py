@@ -0,0 +1,100 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Sans numba, les noyaux s'exécutent en Python pur
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# Signature explicite : compilé dès l'import, sans dispatch de types à l'appel.
+# fastmath sans 'nnan'/'ninf' : l'historique EMA peut contenir des NaN juste après l'amorçage.
+@njit(
+    'Tuple((boolean, float64, int64))(float64[:], float64[:], int64, float64, int64)',
+    cache=True,
+    fastmath={'contract', 'arcp', 'reassoc', 'nsz'},
+    boundscheck=False,
+)
+def volume_filters(vols: np.ndarray, ema_v: np.ndarray, lookback: int, mult: float, min_consec: int):
+    """
+    Filtres volume fusionnés en une seule passe sur les dernières bougies :
+    (pic de volume, croissance EMA Volume en %, bougies consécutives volume > EMA)
+    Le comptage des bougies consécutives s'arrête à min_consec.
+    """
+    n = vols.shape[0]
+    spike = vols[n - 1] > ema_v[n - 1] * mult
+
+    past = ema_v[n - 1 - lookback]
+    growth = 0.0 if past <= 0.0 else (ema_v[n - 1] / past - 1.0) * 100.0
+
+    c = 0
+    for i in range(n - 1, -1, -1):
+        if c >= min_consec or not vols[i] > ema_v[i]:
+            break
+        c += 1
+    return spike, growth, c
+
+
+@njit(cache=True)
+def wilder_rsi_step(gain: float, loss: float, delta: float, period: int):
+    """Avance les moyennes de Wilder (gain, perte) d'une variation"""
+    gain = (gain * (period - 1) + (delta if delta > 0 else 0.0)) / period
+    loss = (loss * (period - 1) + (-delta if delta < 0 else 0.0)) / period
+    return gain, loss
+
+
+@njit(cache=True)
+def wilder_rsi(gain: float, loss: float) -> float:
+    """RSI à partir des moyennes de Wilder : 100 sans perte, 0 sans aucune variation"""
+    total = gain + loss
+    return 100.0 * gain / total if total else 0.0
+
+
+@njit(cache=True)
+def wilder_rsi_state(values: np.ndarray, period: int):
+    """
+    Moyennes de Wilder (gain, perte) en fin de série, amorcées comme talib
+    par la moyenne simple des `period` premières variations
+    """
+    gain = 0.0
+    loss = 0.0
+    for i in range(1, period + 1):
+        delta = values[i] - values[i - 1]
+        if delta > 0:
+            gain += delta
+        else:
+            loss -= delta
+    gain /= period
+    loss /= period
+
+    for i in range(period + 1, values.shape[0]):
+        gain, loss = wilder_rsi_step(gain, loss, values[i] - values[i - 1], period)
+    return gain, loss
+
+
+@njit(cache=True)
+def ema_tail(values: np.ndarray, period: int, size: int) -> np.ndarray:
+    """
+    Dernières `size` valeurs de l'EMA, amorcée par la SMA des `period` premières valeurs
+    (comme talib), sans construire la série complète.
+    """
+    n = values.shape[0]
+    start = n - size
+    out = np.full(size, np.nan)
+
+    s = 0.0
+    for i in range(period):
+        s += values[i]
+    s /= period
+    if period - 1 >= start:
+        out[period - 1 - start] = s
+
+    alpha = 2.0 / (period + 1)
+    for i in range(period, n):
+        s = alpha * values[i] + (1.0 - alpha) * s
+        if i >= start:
+            out[i - start] = s
+    return out
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+import jesse.indicators as ta
+
+from strategies.BigFrish._kernels import ema_tail, volume_filters, wilder_rsi, wilder_rsi_state, wilder_rsi_step
+
+
+def _incremental_rsi(values: np.ndarray, seed_len: int) -> float:
+    """Amorce le RSI sur values[:seed_len] puis l'avance variation par variation"""
+    gain, loss = wilder_rsi_state(values[:seed_len], 14)
+    for delta in np.diff(values[seed_len - 1:]):
+        gain, loss = wilder_rsi_step(gain, loss, delta, 14)
+    return wilder_rsi(gain, loss)
+
+
+def test_wilder_rsi_state_matches_talib_seed():
+    values = np.random.default_rng(0).uniform(100, 10_000, 500)
+    gain, loss = wilder_rsi_state(values, 14)
+
+    np.testing.assert_allclose(wilder_rsi(gain, loss), ta.rsi(values, 14, sequential=True)[-1], rtol=1e-9)
+
+
+def test_incremental_rsi_matches_talib():
+    values = np.random.default_rng(1).uniform(100, 10_000, 500)
+
+    np.testing.assert_allclose(_incremental_rsi(values, 200), ta.rsi(values, 14, sequential=True)[-1], rtol=1e-9)
+
+
+def test_incremental_rsi_all_gains_is_100():
+    values = np.arange(1.0, 301.0)
+
+    assert ta.rsi(values, 14, sequential=True)[-1] == 100
+    assert _incremental_rsi(values, 100) == 100
+
+
+def test_ema_tail_matches_talib():
+    values = np.random.default_rng(2).uniform(100, 10_000, 3000)
+    expected = ta.ema(values, 1400, sequential=True)
+
+    np.testing.assert_allclose(ema_tail(values, 1400, 6), expected[-6:], rtol=1e-9)
+    # Série à peine plus longue que la période : les valeurs avant l'amorçage restent NaN
+    np.testing.assert_allclose(ema_tail(values[:1402], 1400, 6), expected[1396:1402], rtol=1e-9)
+
+
+def _baseline_volume_filters(vols: np.ndarray, ema: np.ndarray, lookback: int, mult: float):
+    """Formules d'origine : pic, croissance ((c - p) / p) * 100 et boucle arrière non plafonnée"""
+    spike = vols[-1] > ema[-1] * mult
+    past = ema[-lookback - 1]
+    growth = 0 if past == 0 else ((ema[-1] - past) / past) * 100
+    count = 0
+    for i in range(len(vols) - 1, -1, -1):
+        if vols[i] > ema[i]:
+            count += 1
+        else:
+            break
+    return spike, growth, count
+
+
+def _run_kernel(vols: np.ndarray, ema: np.ndarray, lookback: int, mult: float, min_consec: int):
+    """Appelle le noyau sur la même fenêtre courte que la stratégie"""
+    size = max(lookback + 1, min_consec)
+    return volume_filters(vols[-size:], ema[-size:], lookback, mult, min_consec)
+
+
+@pytest.mark.parametrize('run', [0, 1, 2, 3, 5])
+def test_volume_filters_matches_baseline(run):
+    lookback, mult, min_consec = 5, 10.0, 3
+    vols = np.random.default_rng(3).uniform(100, 200, 300)
+    if run:
+        vols[-run:] *= 20
+    ema = ta.ema(vols, 50, sequential=True)
+
+    spike, growth, count = _run_kernel(vols, ema, lookback, mult, min_consec)
+    base_spike, base_growth, base_count = _baseline_volume_filters(vols, ema, lookback, mult)
+
+    assert spike == base_spike
+    np.testing.assert_allclose(growth, base_growth, rtol=1e-9)
+    # Comptage plafonné à min_consec (run = 3 : le plafond est atteint exactement)
+    assert count == min(base_count, min_consec)
+    assert (count >= min_consec) == (base_count >= min_consec)
+
+
+def test_volume_filters_leading_nans_after_seeding():
+    lookback, mult, min_consec = 5, 10.0, 5
+    vols = np.random.default_rng(4).uniform(100, 200, 52)
+    vols[-5:] *= 50
+    # Seulement 3 valeurs d'EMA valides : les 3 premières de la fenêtre de 6 sont NaN
+    ema = ta.ema(vols, 50, sequential=True)
+    assert np.isnan(ema[-6:-3]).all()
+
+    spike, growth, count = _run_kernel(vols, ema, lookback, mult, min_consec)
+    base_spike, base_growth, base_count = _baseline_volume_filters(vols, ema, lookback, mult)
+
+    assert spike == base_spike
+    assert not growth >= 15.0
+    assert not base_growth >= 15.0
+    assert count == base_count == 3
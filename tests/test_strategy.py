@@ -0,0 +1,167 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import jesse.indicators as ta
+
+from strategies.BigFrish import VolumeEMAStrategy
+
+VOL_LENGTH = 50
+TREND_LENGTH = 60
+
+
+class _Strategy(VolumeEMAStrategy):
+    """Stratégie isolée du store Jesse : bougies, prix et position fournis par le test"""
+    hp = None
+    candles = None
+    price = None
+    position = None
+    is_long = False
+    is_short = False
+    stop_loss = None
+
+
+def _make_strategy() -> _Strategy:
+    strategy = _Strategy()
+    strategy.hp = {p['name']: p['default'] for p in strategy.hyperparameters()}
+    strategy.hp.update(ema_volume_length=VOL_LENGTH, ema_price_trend=TREND_LENGTH)
+    return strategy
+
+
+def _make_candles(n: int, seed: int = 0) -> np.ndarray:
+    """Bougies [timestamp, open, close, high, low, volume] à une minute d'intervalle"""
+    rng = np.random.default_rng(seed)
+    candles = np.empty((n, 6))
+    candles[:, 0] = 1_600_000_000_000 + 60_000 * np.arange(n)
+    candles[:, 1] = rng.uniform(90, 110, n)
+    candles[:, 2] = rng.uniform(90, 110, n)
+    candles[:, 3] = np.maximum(candles[:, 1], candles[:, 2]) + 1
+    candles[:, 4] = np.minimum(candles[:, 1], candles[:, 2]) - 1
+    candles[:, 5] = rng.uniform(100, 10_000, n)
+    return candles
+
+
+def _assert_matches_full_recompute(strategy: _Strategy, candles: np.ndarray):
+    np.testing.assert_allclose(
+        strategy._ema_vol_state, ta.ema(candles[:, 5], VOL_LENGTH, sequential=True)[-1], rtol=1e-9
+    )
+    np.testing.assert_allclose(
+        strategy._ema_trend_state, ta.ema(candles[:, 2], TREND_LENGTH, sequential=True)[-1], rtol=1e-9
+    )
+    np.testing.assert_allclose(
+        strategy._volume_rsi_last, ta.rsi(candles[:, 5], 14, sequential=True)[-1], rtol=1e-9
+    )
+
+
+def _feed(strategy: _Strategy, candles: np.ndarray):
+    strategy.candles = candles
+    strategy.before()
+
+
+def test_incremental_state_matches_full_recompute():
+    full = _make_candles(200)
+    strategy = _make_strategy()
+
+    for i in range(20, len(full) + 1):
+        _feed(strategy, full[:i])
+        if i < TREND_LENGTH:
+            assert np.isnan(strategy._ema_trend_state)
+            assert np.isnan(strategy._ema_vol_state) == (i < VOL_LENGTH)
+        else:
+            _assert_matches_full_recompute(strategy, full[:i])
+
+
+def test_same_candle_does_not_advance_state():
+    full = _make_candles(100)
+    strategy = _make_strategy()
+    _feed(strategy, full)
+    state = strategy._ema_vol_state
+
+    _feed(strategy, full)
+
+    assert strategy._ema_vol_state == state
+
+
+def test_skipped_candles_trigger_reseed():
+    full = _make_candles(200)
+    strategy = _make_strategy()
+    for i in range(TREND_LENGTH, 151):
+        _feed(strategy, full[:i])
+
+    # Bougies 151 à 154 jamais vues (reconnexion) : pas de dérive, réamorçage complet
+    _feed(strategy, full[:155])
+    _assert_matches_full_recompute(strategy, full[:155])
+
+    _feed(strategy, full[:156])
+    _assert_matches_full_recompute(strategy, full[:156])
+
+
+def test_backfilled_candle_triggers_reseed():
+    full = _make_candles(200)
+    strategy = _make_strategy()
+    for i in range(TREND_LENGTH, 161):
+        _feed(strategy, full[:i])
+
+    # Bougie insérée après coup avant la nouvelle : l'avant-dernière n'est plus celle déjà traitée
+    inserted = full[159].copy()
+    inserted[0] += 30_000
+    inserted[5] *= 3
+    rewritten = np.vstack((full[:160], inserted, full[160]))
+    _feed(strategy, rewritten)
+
+    _assert_matches_full_recompute(strategy, rewritten)
+
+
+def _open_position(side: str, opened_here: bool = True) -> _Strategy:
+    """Position de 1 à 100 ; opened_here=False simule une position reprise après redémarrage"""
+    strategy = _make_strategy()
+    _feed(strategy, _make_candles(20))
+    strategy.position = SimpleNamespace(entry_price=100.0, qty=1.0)
+    strategy.is_long = side == 'long'
+    strategy.is_short = side == 'short'
+    if opened_here:
+        strategy.on_open_position(None)
+    return strategy
+
+
+@pytest.mark.parametrize('opened_here', [True, False])
+@pytest.mark.parametrize('side, price, initial_sl', [
+    ('long', 103.0, 95.0),    # au-delà de l'activation à 102
+    ('long', 101.5, 95.0),    # sous l'activation
+    ('short', 97.0, 105.0),   # au-delà de l'activation à 98
+    ('short', 98.5, 105.0),   # sous l'activation
+])
+def test_trailing_stop_matches_inline_formulas(side, price, initial_sl, opened_here):
+    strategy = _open_position(side, opened_here)
+    if not opened_here:
+        assert strategy._trail_activation_price is None
+    hp = strategy.hp
+    strategy.price = price
+    strategy.stop_loss = [(1.0, initial_sl)]
+
+    strategy.update_position()
+
+    # Formules d'origine, recalculées à chaque bougie depuis position.entry_price
+    if side == 'long':
+        activation_price = 100.0 * (1 + hp['trail_activation'] / 100)
+        activated = price >= activation_price
+        new_sl = price * (1 - hp['trail_offset'] / 100)
+    else:
+        activation_price = 100.0 * (1 - hp['trail_activation'] / 100)
+        activated = price <= activation_price
+        new_sl = price * (1 + hp['trail_offset'] / 100)
+    np.testing.assert_allclose(strategy._trail_activation_price, activation_price, rtol=1e-12)
+    if activated:
+        assert strategy.stop_loss == (1.0, pytest.approx(new_sl, rel=1e-12))
+    else:
+        assert strategy.stop_loss == [(1.0, initial_sl)]
+
+
+def test_close_position_resets_trailing_levels():
+    strategy = _open_position('long')
+    assert strategy._trail_activation_price is not None
+
+    strategy.on_close_position(None)
+
+    assert strategy._trail_activation_price is None
+    assert strategy._trail_mult is None